@@ -3,31 +3,74 @@
 import os
 import re
 import sys
-import json
 import time
 import logging
+import tempfile
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from kubernetes import client, config
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Dict, FrozenSet, List, Optional, Tuple, Set
 
-# Configure logging
+# Configure logging (unknown LOG_LEVEL values fall back to INFO)
+log_level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), None)
 logging.basicConfig(
-    level=logging.INFO,
+    level=log_level if isinstance(log_level, int) else logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# resourceVersion="0" lets the apiserver answer LISTs from its watch cache
+# (kept current by its own informers) instead of a quorum read from etcd.
+# Each run is a fresh CronJob pod, so this is the informer cache we can reuse.
+LIST_OPTS = {"resource_version": "0"}
+
+# Up to this many watched objects of a kind are fetched by name; beyond that
+# we list each of their namespaces instead.
+NAME_SELECTOR_MAX = 20
+
+# Concurrent list calls per getter, and the apiserver connection pool sized so the
+# five getters running at once never exceed it (urllib3 drops connections past the cap)
+LIST_WORKERS = 8
+K8S_POOL_MAXSIZE = 5 * LIST_WORKERS
+
+# Concurrent PagerDuty POSTs; the session's connection pool is at least this large
+PD_POST_WORKERS = 8
+
+# Trailing "-<hash>" suffix stripped from metric names
+_RS_HASH_RE = re.compile(r'-[a-zA-Z0-9]+$')
+
 class MetricsScraper:
     def __init__(self):
         self.pagerduty_token = os.getenv('PAGERDUTY_TOKEN') 
         self.pagerduty_routing_key = os.getenv('PAGERDUTY_ROUTING_KEY')
         self.namespace = os.getenv('TARGET_NAMESPACE')
-        self.watch_json = json.loads(os.getenv('WATCH_JSON'))
+        self.watch_json = orjson.loads(os.getenv('WATCH_JSON'))
 
         if not self.pagerduty_token or not self.pagerduty_routing_key:
             raise ValueError("PAGERDUTY_TOKEN and PAGERDUTY_ROUTING_KEY must be set")
         
+        # Pooled keep-alive session for PagerDuty so repeated events reuse one TLS connection
+        self.pagerduty_url = "https://events.pagerduty.com/v2/enqueue"
+        self.pd_session = requests.Session()
+        self.pd_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(16, PD_POST_WORKERS)))
+        self.pd_session.headers.update({"Content-Type": "application/json"})
+
+        # Last event state ("healthy"/"unhealthy") sent per dedup key, kept across runs.
+        # Defaults to the CronJob's /data volume so it survives between pods.
+        self.state_file = os.getenv('STATE_FILE', '/data/pd_state.json')
+        self._last_state: Dict[str, str] = self._load_state()
+
+        # Static part of the trigger payload; per-event fields are merged in at send time
+        self.pd_payload_base = {
+            "severity": "critical",
+            "source": "k8s-metrics-scraper",
+            "group": "kubernetes",
+            "class": "replica_failure",
+        }
+
         # Initializing K8s client
         try:
             config.load_incluster_config()
@@ -38,58 +81,100 @@ class MetricsScraper:
                 logger.error(f"Failed to load Kubernetes config: {e}")
                 raise
         
-        self.k8s_apps_v1 = client.AppsV1Api()
-        self.k8s_core_v1 = client.CoreV1Api()
-        self.k8s_batch_v1 = client.BatchV1Api()
+        # One shared ApiClient (and connection pool) for all three APIs.
+        # Ask the apiserver to gzip large LIST responses; urllib3 inflates them transparently.
+        k8s_config = client.Configuration.get_default_copy()
+        k8s_config.connection_pool_maxsize = max(k8s_config.connection_pool_maxsize, K8S_POOL_MAXSIZE)
+        api_client = client.ApiClient(k8s_config)
+        api_client.set_default_header("Accept-Encoding", "gzip")
+        self.k8s_apps_v1 = client.AppsV1Api(api_client)
+        self.k8s_core_v1 = client.CoreV1Api(api_client)
+        self.k8s_batch_v1 = client.BatchV1Api(api_client)
 
         logger.info("\n--- Version Information ---")
         logger.info(f"Python Version: {sys.version.split()[0]} (Full: {sys.version.splitlines()[0]})") 
 
-        # Build quick-lookup sets from watch.json
-        self.watch_pairs_by_kind: Dict[str, Set[Tuple[str, str]]] = {}
+        # Build quick-lookup sets of interned "ns/name" keys from watch.json
+        # (kinds are lowercased once, here; a single string hashes cheaper than a tuple)
+        pairs_by_kind: Dict[str, Set[str]] = {}
         for item in self.watch_json:
             kind = (item.get("kind") or "Deployment").lower()
             ns = item["namespace"]
             name = item["name"]
-            self.watch_pairs_by_kind.setdefault(kind, set()).add((ns, name))
+            pairs_by_kind.setdefault(kind, set()).add(sys.intern(f"{ns}/{name}"))
+        self.watch_pairs_by_kind: Dict[str, FrozenSet[str]] = {
+            k: frozenset(v) for k, v in pairs_by_kind.items()
+        }
 
         # Also keep a set of all namespaces mentioned, as a fallback
-        self.watched_namespaces = {item["namespace"] for item in self.watch_json}
+        self.watched_namespaces = frozenset(item["namespace"] for item in self.watch_json)
 
     # ---------- Helpers ----------
-    def _is_watched(self, kind: str, namespace: str, name: str) -> bool:
-        """Return True if (ns,name) is explicitly in watch.json for this kind."""
-        pairs = self.watch_pairs_by_kind.get(kind.lower())
-        if pairs:
-            return (namespace, name) in pairs
-        # Fallback to namespace-only filtering if pairs is empty for this kind
-        return namespace in self.watched_namespaces
-
+    def _list_watched(self, kind: str, list_namespaced) -> List:
+        """
+        List only the objects of this kind that can match watch.json, filtered server-side.
+        - Few watched pairs  -> one name-selected list per pair
+        - Many watched pairs -> one list per namespace they live in
+        - No pairs           -> one list per watched namespace (namespace-only fallback)
+        Callers therefore only need to check "ns/name" against the pairs when pairs exist.
+        """
+        pairs = self.watch_pairs_by_kind.get(kind)
+        if pairs and len(pairs) <= NAME_SELECTOR_MAX:
+            calls = []
+            for key in pairs:
+                ns, name = key.split("/", 1)
+                calls.append({"namespace": ns, "field_selector": f"metadata.name={name}"})
+        else:
+            namespaces = {key.split("/", 1)[0] for key in pairs} if pairs else self.watched_namespaces
+            calls = [{"namespace": ns} for ns in namespaces]
+        return self._list_concurrently(list_namespaced, calls)
+
+    def _list_concurrently(self, list_fn, calls: List[Dict]) -> List:
+        """Issue one list call per kwargs dict in parallel and concatenate their items."""
+        if not calls:
+            return []
+        def fetch(kwargs: Dict) -> List:
+            return list_fn(**kwargs, **LIST_OPTS).items
+
+        with ThreadPoolExecutor(max_workers=min(LIST_WORKERS, len(calls))) as ex:
+            return [obj for items in ex.map(fetch, calls) for obj in items]
+
+    def _list_raw(self, list_fn, **kwargs) -> List[Dict]:
+        """
+        Call a list endpoint without building the client's model objects.
+        Returns the raw JSON items as plain dicts (camelCase keys, as sent by the apiserver).
+        """
+        resp = list_fn(_preload_content=False, **LIST_OPTS, **kwargs)
+        try:
+            return orjson.loads(resp.data).get("items") or []
+        finally:
+            resp.release_conn()
 
     def remove_replicaset_hash(self, metric_name: str) -> str:
         """Remove trailing alphanumeric hash if present, otherwise return as-is"""
-        # Check if string ends with hyphen followed by alphanumeric characters
+        # Strip a trailing hyphen followed by alphanumeric characters (no-op when absent)
         # This helps simplify the resolution since we don't store the state
-
-        if re.search(r'-[a-zA-Z0-9]+$', metric_name):
-            return re.sub(r'-[a-zA-Z0-9]+$', '', metric_name)
-        return metric_name
+        m = _RS_HASH_RE.search(metric_name)
+        return metric_name[:m.start()] if m else metric_name
     
     # ---------- Deployments ----------
-    def get_deployment_metrics(self) -> List[Dict]:
+    def get_deployment_metrics(self, ts: str) -> List[Dict]:
         """Scraping Deployment metrics from Cluster"""
         metrics = []
         try:
-            deployments = self.k8s_apps_v1.list_deployment_for_all_namespaces()
-            for deployment in deployments.items:
-                name = deployment.metadata.name
-                namespace = deployment.metadata.namespace
-                if not self._is_watched("deployment", namespace, name):
+            watched = self.watch_pairs_by_kind.get("deployment")
+            deployments = self._list_watched("deployment", self.k8s_apps_v1.list_namespaced_deployment)
+            for deployment in deployments:
+                md = deployment.metadata
+                name = md.name
+                namespace = md.namespace
+                if watched and f"{namespace}/{name}" not in watched:
                     continue
 
+                st = deployment.status
                 desired_replicas = deployment.spec.replicas or 0
-                available_replicas = deployment.status.available_replicas or 0
-                ready_replicas = deployment.status.ready_replicas or 0
+                available_replicas = st.available_replicas or 0
+                ready_replicas = st.ready_replicas or 0
 
                 metrics.append({
                     'name': name,
@@ -98,37 +183,41 @@ class MetricsScraper:
                     'desired_replicas': desired_replicas,
                     'available_replicas': available_replicas,
                     'ready_replicas': ready_replicas,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': ts
                 })
-                logger.info(
-                    f"Deployment {namespace}/{name}: {available_replicas}/{desired_replicas} available"
+                logger.debug(
+                    "Deployment %s/%s: %d/%d available", namespace, name, available_replicas, desired_replicas
                 )
         except Exception as e:
             logger.error(f"Failed to get Deployment metrics: {e}")
         return metrics
 
     # ---------- ReplicaSets ----------
-    def get_replicaset_metrics(self) -> List[Dict]:
+    def get_replicaset_metrics(self, ts: str) -> List[Dict]:
         """Scrape ReplicaSet metrics from Kubernetes"""
         metrics = []
         try:
-            replicasets = self.k8s_apps_v1.list_replica_set_for_all_namespaces()
-            for rs in replicasets.items:
-                name = rs.metadata.name
-                namespace = rs.metadata.namespace
-                # We only include ReplicaSets if their owning Deployment is explicitly watched
-                # (If desired, you can relax this to namespace-only.)
-                if not self._is_watched("replicaset", namespace, name) and namespace not in self.watched_namespaces:
-                    continue
+            # ReplicaSet names carry a pod-template hash, so they are matched by namespace only.
+            # They are the highest-cardinality kind, so list just the watched namespaces, concurrently.
+            replicasets = self._list_concurrently(
+                self.k8s_apps_v1.list_namespaced_replica_set,
+                [{"namespace": ns} for ns in self.watched_namespaces],
+            )
 
-                desired_replicas = rs.spec.replicas or 0
-                available_replicas = rs.status.available_replicas or 0
-                ready_replicas = rs.status.ready_replicas or 0
+            for rs in replicasets:
+                md = rs.metadata
+                namespace = md.namespace
 
+                desired_replicas = rs.spec.replicas or 0
                 # Skip ReplicaSets with 0 desired replicas (scaled to zero)
                 if desired_replicas == 0:
                     continue
 
+                st = rs.status
+                name = md.name
+                available_replicas = st.available_replicas or 0
+                ready_replicas = st.ready_replicas or 0
+
                 metrics.append({
                     'name': name,
                     'namespace': namespace,
@@ -136,22 +225,24 @@ class MetricsScraper:
                     'desired_replicas': desired_replicas,
                     'available_replicas': available_replicas,
                     'ready_replicas': ready_replicas,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': ts
                 })
         except Exception as e:
             logger.error(f"Failed to get ReplicaSet metrics: {e}")
         return metrics
 
     # ---------- DaemonSets ----------
-    def get_daemonset_metrics(self) -> List[Dict]:
+    def get_daemonset_metrics(self, ts: str) -> List[Dict]:
         """Scrape DaemonSet metrics. Map 'available' to number_ready."""
         metrics = []
         try:
-            dss = self.k8s_apps_v1.list_daemon_set_for_all_namespaces()
-            for ds in dss.items:
-                name = ds.metadata.name
-                namespace = ds.metadata.namespace
-                if not self._is_watched("daemonset", namespace, name):
+            watched = self.watch_pairs_by_kind.get("daemonset")
+            dss = self._list_watched("daemonset", self.k8s_apps_v1.list_namespaced_daemon_set)
+            for ds in dss:
+                md = ds.metadata
+                name = md.name
+                namespace = md.namespace
+                if watched and f"{namespace}/{name}" not in watched:
                     continue
 
                 status = ds.status or client.V1DaemonSetStatus()
@@ -172,31 +263,35 @@ class MetricsScraper:
                     'current_number_scheduled': current,
                     'updated_number_scheduled': updated,
                     'number_misscheduled': misscheduled,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': ts
                 })
-                logger.info(
-                    f"DaemonSet {namespace}/{name}: ready {ready} / desired {desired} (current {current}, updated {updated}, mis {misscheduled})"
+                logger.debug(
+                    "DaemonSet %s/%s: ready %d / desired %d (current %d, updated %d, mis %d)",
+                    namespace, name, ready, desired, current, updated, misscheduled
                 )
         except Exception as e:
             logger.error(f"Failed to get DaemonSet metrics: {e}")
         return metrics
 
     # ---------- StatefulSets ----------
-    def get_statefulset_metrics(self) -> List[Dict]:
+    def get_statefulset_metrics(self, ts: str) -> List[Dict]:
         """Scrape StatefulSet metrics. Treat 'ready_replicas' as 'available' for stateless checks."""
         metrics = []
         try:
-            ssets = self.k8s_apps_v1.list_stateful_set_for_all_namespaces()
-            for ss in ssets.items:
-                name = ss.metadata.name
-                namespace = ss.metadata.namespace
-                if not self._is_watched("statefulset", namespace, name):
+            watched = self.watch_pairs_by_kind.get("statefulset")
+            ssets = self._list_watched("statefulset", self.k8s_apps_v1.list_namespaced_stateful_set)
+            for ss in ssets:
+                md = ss.metadata
+                name = md.name
+                namespace = md.namespace
+                if watched and f"{namespace}/{name}" not in watched:
                     continue
 
+                st = ss.status
                 desired = ss.spec.replicas or 0
-                ready = ss.status.ready_replicas or 0
-                current = ss.status.current_replicas or 0
-                updated = ss.status.updated_replicas or 0
+                ready = st.ready_replicas or 0
+                current = st.current_replicas or 0
+                updated = st.updated_replicas or 0
 
                 metrics.append({
                     'name': name,
@@ -207,17 +302,18 @@ class MetricsScraper:
                     'ready_replicas': ready,
                     'current_replicas': current,
                     'updated_replicas': updated,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': ts
                 })
-                logger.info(
-                    f"StatefulSet {namespace}/{name}: ready {ready} / desired {desired} (current {current}, updated {updated})"
+                logger.debug(
+                    "StatefulSet %s/%s: ready %d / desired %d (current %d, updated %d)",
+                    namespace, name, ready, desired, current, updated
                 )
         except Exception as e:
             logger.error(f"Failed to get StatefulSet metrics: {e}")
         return metrics
 
     # ---------- CronJobs ----------
-    def get_cronjob_metrics(self) -> List[Dict]:
+    def get_cronjob_metrics(self, ts: str) -> List[Dict]:
         """
         Scrape CronJob metrics.
         - If spec.suspend is True -> ignore (treated as desired==0)
@@ -227,12 +323,44 @@ class MetricsScraper:
         """
         metrics = []
         try:
-            cronjobs = self.k8s_batch_v1.list_cron_job_for_all_namespaces()
-            for cj in cronjobs.items:
-                name = cj.metadata.name
-                namespace = cj.metadata.namespace
-                if not self._is_watched("cronjob", namespace, name):
-                    continue
+            watched = self.watch_pairs_by_kind.get("cronjob")
+            cronjobs = self._list_watched("cronjob", self.k8s_batch_v1.list_namespaced_cron_job)
+            watched_cronjobs = [
+                cj for cj in cronjobs
+                if not watched or f"{cj.metadata.namespace}/{cj.metadata.name}" in watched
+            ]
+
+            # Jobs/Pods are listed once per namespace holding a watched CronJob, not once per CronJob.
+            # Only the few fields we need are kept: (job name, failed count) and pod phases.
+            jobs_by_owner: Dict[Tuple[str, str], List[Tuple[str, int]]] = {}
+            phases_by_jobname: Dict[Tuple[str, str], List[str]] = {}
+            for ns in {cj.metadata.namespace for cj in watched_cronjobs}:
+                try:
+                    for job in self._list_raw(self.k8s_batch_v1.list_namespaced_job, namespace=ns):
+                        md = job["metadata"]
+                        # Job status.failed can be missing
+                        failed = (job.get("status") or {}).get("failed") or 0
+                        for ref in md.get("ownerReferences") or ():
+                            if ref.get("kind") == "CronJob":
+                                jobs_by_owner.setdefault((ns, ref["name"]), []).append((md["name"], failed))
+                except Exception as je:
+                    logger.warning(f"Failed to list Jobs in namespace {ns}: {je}")
+
+                try:
+                    # Pods from Jobs typically have a 'job-name' label; only fetch those
+                    pods = self._list_raw(self.k8s_core_v1.list_namespaced_pod, namespace=ns, label_selector="job-name")
+                    for pod in pods:
+                        job_name = (pod["metadata"].get("labels") or {}).get("job-name")
+                        if job_name:
+                            phase = (pod.get("status") or {}).get("phase") or ""
+                            phases_by_jobname.setdefault((ns, job_name), []).append(phase)
+                except Exception as pe:
+                    logger.warning(f"Failed to list Pods in namespace {ns}: {pe}")
+
+            for cj in watched_cronjobs:
+                md = cj.metadata
+                name = md.name
+                namespace = md.namespace
 
                 spec = cj.spec or client.V1CronJobSpec()
                 status = cj.status or client.V1CronJobStatus()
@@ -251,34 +379,17 @@ class MetricsScraper:
                 # Check Jobs owned by this CronJob
                 failed_jobs = 0
                 job_names = []
-                try:
-                    jobs = self.k8s_batch_v1.list_namespaced_job(namespace=namespace)
-                    for job in jobs.items:
-                        if job.metadata and job.metadata.owner_references:
-                            for ref in job.metadata.owner_references:
-                                if ref.kind == "CronJob" and ref.name == name:
-                                    job_names.append(job.metadata.name)
-                                    # Job status.failed can be None
-                                    if job.status and (job.status.failed or 0) > 0:
-                                        failed_jobs += 1
-                except Exception as je:
-                    logger.warning(f"Failed to list Jobs for CronJob {namespace}/{name}: {je}")
+                for job_name, failed in jobs_by_owner.get((namespace, name), []):
+                    job_names.append(job_name)
+                    if failed > 0:
+                        failed_jobs += 1
 
                 # Check Pods of those Jobs for failed/unknown phases
                 failed_pods = 0
-                if job_names:
-                    try:
-                        pods = self.k8s_core_v1.list_namespaced_pod(namespace=namespace)
-                        job_name_set = set(job_names)
-                        for pod in pods.items:
-                            labels = pod.metadata.labels or {}
-                            # Pods from Jobs typically have a 'job-name' label
-                            if labels.get("job-name") in job_name_set:
-                                phase = (pod.status.phase or "").lower()
-                                if phase in ("failed", "unknown"):
-                                    failed_pods += 1
-                    except Exception as pe:
-                        logger.warning(f"Failed to list Pods for CronJob {namespace}/{name}: {pe}")
+                for job_name in job_names:
+                    for phase in phases_by_jobname.get((namespace, job_name), []):
+                        if phase.lower() in ("failed", "unknown"):
+                            failed_pods += 1
 
                 healthy = (not suspended) and (last_success_iso is not None) and (failed_jobs == 0) and (failed_pods == 0)
                 available = 1 if healthy else 0
@@ -294,25 +405,28 @@ class MetricsScraper:
                     'last_successful_time': last_success_iso,
                     'failed_jobs': failed_jobs,
                     'failed_pods': failed_pods,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': ts
                 })
-                logger.info(
-                    f"CronJob {namespace}/{name}: enabled={not suspended}, last_success={last_success_iso}, failed_jobs={failed_jobs}, failed_pods={failed_pods} -> available={available}"
+                logger.debug(
+                    "CronJob %s/%s: enabled=%s, last_success=%s, failed_jobs=%d, failed_pods=%d -> available=%d",
+                    namespace, name, not suspended, last_success_iso, failed_jobs, failed_pods, available
                 )
         except Exception as e:
             logger.error(f"Failed to get CronJob metrics: {e}")
         return metrics
 
-    # ---------- Stateless evaluation ----------
-    def evaluate_and_notify(self, metrics: List[Dict]):
+    # ---------- Evaluation ----------
+    def _reduce_by_dedup_key(self, metrics: List[Dict]) -> Dict[str, Tuple[str, Dict]]:
         """
-        Stateless evaluation (uniform for all kinds):
-        - If desired > 0 and available == 0  -> trigger
-        - If desired > 0 and available > 0   -> resolve
-        - If desired == 0                    -> do nothing
+        Collapse metrics to one (state, metric) per PagerDuty dedup key.
+        remove_replicaset_hash drops the last "-segment" of every metric name, whatever its kind,
+        so unrelated resources can share a key: Deployment "blog" and its ReplicaSet
+        "blog-<hash>" both map to ns/blog, but Deployment "ingress-nginx-controller" maps to
+        ns/ingress-nginx while its ReplicaSet maps to ns/ingress-nginx-controller.
+        A key is unhealthy if any of its metrics is (the first unhealthy metric, in run() order,
+        is kept for the alert), so a trigger and a resolve for one key are never posted together.
         """
-        triggers = 0
-        resolves = 0
+        current: Dict[str, Tuple[str, Dict]] = {}
         for metric in metrics:
             desired = metric.get('desired_replicas', 0) or 0
             available = metric.get('available_replicas', 0) or 0
@@ -322,9 +436,46 @@ class MetricsScraper:
      
             metric['name'] = self.remove_replicaset_hash(metric['name']    )
             resource_key = f"{metric['namespace']}/{metric['name']}"
-            unhealthy = (available == 0)
+            dedup_key = f"k8s-zero-replicas-{resource_key}"
+            state = "unhealthy" if available == 0 else "healthy"
+            if current.get(dedup_key, ("",))[0] != "unhealthy":
+                current[dedup_key] = (state, metric)
+        return current
 
-            if unhealthy:
+    def evaluate_and_notify(self, metrics: List[Dict]):
+        """
+        Evaluation (uniform for all kinds), one event per dedup key:
+        - If desired > 0 and available == 0  -> trigger
+        - If desired > 0 and available > 0   -> resolve
+        - If desired == 0                    -> do nothing
+        Resolves are skipped when the last state sent for that key was already healthy.
+        Triggers are always re-sent (PagerDuty dedups them on an open incident), so an
+        incident closed while the resource is still down gets re-opened.
+        Remaining events are posted concurrently over the pooled session.
+        State is saved before posting so it can only err towards sending a resolve:
+        every currently unhealthy key is persisted as unhealthy first, and keys no
+        longer reported are pruned.
+        """
+        current = self._reduce_by_dedup_key(metrics)
+
+        self._last_state = {k: v for k, v in self._last_state.items() if k in current}
+        for dedup_key, (state, _) in current.items():
+            if state == "unhealthy":
+                self._last_state[dedup_key] = "unhealthy"
+        self._save_state()
+
+        alerts: List[Dict] = []
+        resolves: List[Dict] = []
+        alert_keys: List[str] = []
+        resolve_keys: List[str] = []
+        unchanged = 0
+        for dedup_key, (state, metric) in current.items():
+            if state == "healthy" and self._last_state.get(dedup_key) == "healthy":
+                unchanged += 1
+                continue
+
+            resource_key = f"{metric['namespace']}/{metric['name']}"
+            if state == "unhealthy":
                 alert = {
                     'resource': resource_key,
                     'type': metric['type'],
@@ -333,69 +484,109 @@ class MetricsScraper:
                 }
 
                 logger.info(
-                    f"Sending PagerDuty alert with dedup key: k8s-zero-replicas-{resource_key}"
+                    f"Sending PagerDuty alert with dedup key: {dedup_key}"
                 )
-                if self.send_pagerduty_alert(alert):
-                    triggers += 1
+                alerts.append(self.build_pagerduty_alert(alert))
+                alert_keys.append(dedup_key)
             else:
                 logger.info(
-                    f"Sending PagerDuty resolve with dedup key: k8s-zero-replicas-{resource_key}"
+                    f"Sending PagerDuty resolve with dedup key: {dedup_key}"
                 )
-                if self.send_pagerduty_resolve(resource_key, metric['type'], metric):
-                    resolves += 1
+                resolves.append(self.build_pagerduty_resolve(resource_key))
+                resolve_keys.append(dedup_key)
+
+        with ThreadPoolExecutor(max_workers=PD_POST_WORKERS) as ex:
+            results = list(ex.map(self._post_event, alerts + resolves))
+
+        # Only record resolves PagerDuty accepted, so failed ones are retried next run
+        for dedup_key, ok in zip(resolve_keys, results[len(alerts):]):
+            if ok:
+                self._last_state[dedup_key] = "healthy"
+        self._save_state()
+
+        triggers = sum(results[:len(alerts)])
+        resolved = sum(results[len(alerts):])
+
+        logger.info(f"Notify complete - triggers: {triggers}, resolves: {resolved}, unchanged: {unchanged}")
 
-        logger.info(f"Stateless notify complete - triggers: {triggers}, resolves: {resolves}")
+    # ---------- State ----------
+    def _load_state(self) -> Dict[str, str]:
+        """Load the last state sent per dedup key; start empty if missing or unreadable"""
+        try:
+            with open(self.state_file, "rb") as f:
+                state = orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Failed to load PagerDuty state from {self.state_file}: {e}")
+            return {}
+        if not isinstance(state, dict):
+            logger.warning(f"Ignoring PagerDuty state in {self.state_file}: expected a JSON object")
+            return {}
+        return state
+
+    def _save_state(self):
+        """
+        Persist the last state sent per dedup key for the next run.
+        Written to a temp file in the same directory and renamed over the old one,
+        so a pod killed mid-write never leaves a truncated state file behind.
+        If saving fails, the old file is removed rather than left stale, so the next run
+        starts empty and re-sends resolves instead of suppressing them.
+        """
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.state_file) or ".", suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(self._last_state))
+            os.replace(tmp_path, self.state_file)
+        except Exception as e:
+            logger.warning(f"Failed to save PagerDuty state to {self.state_file}: {e}")
+            for path in (tmp_path, self.state_file):
+                try:
+                    if path:
+                        os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as ue:
+                    logger.warning(f"Failed to remove stale PagerDuty state {path}: {ue}")
 
     # ---------- PagerDuty ----------
-    def send_pagerduty_alert(self, alert: Dict):
-        """Send alert to PagerDuty"""
-        url = "https://events.pagerduty.com/v2/enqueue"
+    def build_pagerduty_alert(self, alert: Dict) -> Dict:
+        """Build a PagerDuty trigger event"""
         dedup_key = f"k8s-zero-replicas-{alert['resource']}"
-        payload = {
+        return {
             "routing_key": self.pagerduty_routing_key,
             "event_action": "trigger",
             "dedup_key": dedup_key,  # For resolving later
             "payload": {
+                **self.pd_payload_base,
                 "summary": f"Kubernetes {alert['type']} {alert['resource']} has 0 available replicas",
-                "severity": "critical",
-                "source": f"k8s-metrics-scraper",
                 "component": alert['resource'],
-                "group": "kubernetes",
-                "class": "replica_failure",
                 "custom_details": alert['metric']
             }
         }
-        headers = {
-            "Content-Type": "application/json"
-        }         
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            logger.info(f"Successfully sent PagerDuty alert for {alert['resource']}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send PagerDuty alert for {alert['resource']}: {e}")
-            return False
 
-    def send_pagerduty_resolve(self, resource_key: str, resource_type: str, metric: Dict):
-        """Send resolve alert to PagerDuty when resource recovers"""
-        url = "https://events.pagerduty.com/v2/enqueue"
+    def build_pagerduty_resolve(self, resource_key: str) -> Dict:
+        """Build a PagerDuty resolve event for a recovered resource"""
         dedup_key = f"k8s-zero-replicas-{resource_key}"
-        payload = {
+        return {
             "routing_key": self.pagerduty_routing_key,
             "event_action": "resolve",
             "dedup_key": dedup_key
         }
-        headers = {
-            "Content-Type": "application/json"
-        }      
+
+    def _post_event(self, payload: Dict) -> bool:
+        """POST a single event to PagerDuty over the pooled session"""
+        action = payload["event_action"]
+        dedup_key = payload["dedup_key"]
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            # Content-Type: application/json is preset on the session
+            response = self.pd_session.post(self.pagerduty_url, data=orjson.dumps(payload), timeout=30)
             response.raise_for_status()
-            logger.info(f"Successfully sent PagerDuty resolve for {resource_key}")
+            logger.info(f"Successfully sent PagerDuty {action} for {dedup_key}")
             return True
         except Exception as e:
-            logger.error(f"Failed to send PagerDuty resolve for {resource_key}: {e}")
+            logger.error(f"Failed to send PagerDuty {action} for {dedup_key}: {e}")
             return False
 
     # ---------- Main ----------
@@ -403,19 +594,31 @@ class MetricsScraper:
         """Main execution function"""
         logger.info("Starting metrics scraping run")
 
+        getters = (
+            self.get_deployment_metrics,
+            self.get_replicaset_metrics,
+            self.get_daemonset_metrics,
+            self.get_statefulset_metrics,
+            self.get_cronjob_metrics,
+        )
+
+        # One timestamp for the whole run; every metric describes the same snapshot
+        ts = datetime.now().isoformat()
+
+        # The getters are independent apiserver round-trips, so overlap them.
+        # Results are collected in submission order so events are deterministic across runs.
         all_metrics: List[Dict] = []
-        all_metrics.extend(self.get_deployment_metrics())
-        all_metrics.extend(self.get_replicaset_metrics())
-        all_metrics.extend(self.get_daemonset_metrics())
-        all_metrics.extend(self.get_statefulset_metrics())
-        all_metrics.extend(self.get_cronjob_metrics())
+        with ThreadPoolExecutor(max_workers=len(getters)) as ex:
+            futures = [ex.submit(getter, ts) for getter in getters]
+            for future in futures:
+                all_metrics.extend(future.result())
 
         logger.info(f"Collected {len(all_metrics)} metrics")
 
-        # Stateless: evaluate current health and notify PD accordingly
+        # Evaluate current health and notify PD of state changes
         self.evaluate_and_notify(all_metrics)
 
-        logger.info("Completed metrics scraping run (stateless)")
+        logger.info("Completed metrics scraping run")
 
 if __name__ == "__main__":
     try: